@@ -0,0 +1,188 @@
+##### Checks for graph_tools. Run as: python check_graph_tools.py [number of lines of smaller_imdb_cleaned.txt to use]
+#####
+##### Each check builds graphs with graph_tools and compares them against a plain-Python version of the same computation:
+##### Read_edges against the one-pair-at-a-time definition, Degeneracy against a naive smallest-last removal, and
+##### Separation against a breadth first search over the adjacency list.
+
+import os
+import sys
+import heapq
+import itertools
+import tempfile
+import collections
+import graph_tools
+from graph_tools import graph
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'smaller_imdb_cleaned.txt')
+
+
+#### Write the first num_lines lines of the movie file, plus a few corner cases, into a file in dirname. Output is its name.
+####
+
+def Movie_file(num_lines, dirname):
+    with open(DATA, 'r', encoding='utf-8') as f_input:
+        lines = list(itertools.islice(f_input, num_lines))
+    lines += ['\n',                          # Empty line
+              'Solo_Movie Lonely_Actor\n',   # Single actor, so no edges and no vertex
+              'Twin_Movie Twin_Actor Twin_Actor\n',    # Same actor twice, so only a self loop
+              lines[0]]                      # Repeated movie, so no new edges
+    fname = os.path.join(dirname, 'movies.txt')
+    with open(fname, 'w', encoding='utf-8') as f_output:
+        f_output.writelines(lines)
+    return fname
+
+
+#### The definition of Read_edges: every pair of actors of a movie is an edge, an edge keeps the first movie, and
+#### vertices and neighbors appear in order of first edge. Output is the adjacency list, as a dict of dicts.
+####
+
+def Reference_adj_list(fname):
+    adj = dict()
+    with open(fname, 'r', encoding='utf-8') as f_input:
+        for line in f_input:
+            tokens = line.split()
+            for actor1, actor2 in itertools.combinations(tokens[1:], 2):
+                if actor1 == actor2 or actor2 in adj.get(actor1, ()):
+                    continue
+                adj.setdefault(actor1, dict())[actor2] = tokens[0]
+                adj.setdefault(actor2, dict())[actor1] = tokens[0]
+    return adj
+
+
+def Check_read_edges(fname):
+    g = graph()
+    g.Read_edges(fname)
+    ref = Reference_adj_list(fname)
+
+    assert list(g.adj_list.items()) == list(ref.items())    # Same lists, values and order
+    assert list(g.vertices) == list(ref)
+    assert 'Lonely_Actor' not in g.vertices and 'Twin_Actor' not in g.vertices
+    movies = [movie for nbrs in g.adj_list.values() for movie in nbrs.values()]
+    assert len(set(map(id, movies))) == len(set(movies))    # Each movie name is stored once
+    assert all(node is g._name_of[g._id_of[node]] for nbrs in g.adj_list.values() for node in nbrs)    # So is each vertex name
+    assert dict(g.degrees) == {node: len(nbrs) for node, nbrs in ref.items()}
+
+    degs = [len(nbrs) for nbrs in ref.values()]
+    assert g.Size() == [len(ref), sum(degs), sum(d*(d-1)//2 for d in degs)]
+    assert list(g.Deg_dist()) == [degs.count(d) for d in range(max(degs)+1)]
+
+    h = graph()                              # The same graph, one Add_und_edge call at a time
+    for node1, nbrs in ref.items():
+        for node2, movie in nbrs.items():
+            h.Add_und_edge(node1, node2, movie)
+    assert h.adj_list == g.adj_list and h.Size() == g.Size()
+    return g
+
+
+#### Check that the DAG from Degeneracy comes from a smallest-last order: each vertex, when removed, has the minimum degree
+#### among the remaining vertices, and every edge points from the endpoint removed first to the one removed later.
+#### The largest degree at removal is the degeneracy, and it must equal the largest out-degree in the DAG.
+####
+
+def Check_degeneracy(g):
+    dag = g.Degeneracy()
+    order = [dag._name_of[v] for v in dag.top_order]
+    assert sorted(order) == sorted(g.vertices)
+
+    rank = {node: i for i, node in enumerate(order)}
+    for node in order:
+        assert dag.adj_list[node] == {nbr for nbr in g.adj_list[node] if rank[nbr] > rank[node]}
+        assert dag.degrees[node] == len(dag.adj_list[node])
+
+    cur = dict(g.degrees)                    # Degrees in the remaining graph
+    heap = [(d, node) for node, d in cur.items()]    # Lazy min-heap of (degree, vertex); stale entries are skipped
+    heapq.heapify(heap)
+    degeneracy = 0
+    for node in order:
+        while heap[0][1] not in cur or heap[0][0] != cur[heap[0][1]]:
+            heapq.heappop(heap)
+        assert cur[node] == heap[0][0]       # node has minimum degree
+        degeneracy = max(degeneracy, cur[node])
+        del cur[node]
+        for nbr in g.adj_list[node]:
+            if nbr in cur:
+                cur[nbr] -= 1
+                heapq.heappush(heap, (cur[nbr], nbr))
+    assert degeneracy == max(dag.degrees.values())
+
+    with tempfile.TemporaryDirectory() as dirname:    # DAG.Output lists the vertices in topological order
+        name = os.path.join(dirname, 'dag.txt')
+        dag.Output(name)
+        with open(name, 'r') as f_input:
+            assert [line.split(' ')[0][:-1] for line in f_input] == order    # Lines are 'node: nbr nbr ... ', and node has no spaces
+
+
+#### Breadth first search from node1 over the adjacency list. Output is the distance to node2, or None.
+####
+
+def Bfs_distance(g, node1, node2):
+    dist = {node1: 0}
+    queue = collections.deque([node1])
+    while queue:
+        u = queue.popleft()
+        if u == node2:
+            return dist[u]
+        for v in g.adj_list[u]:
+            if v not in dist:
+                dist[v] = dist[u]+1
+                queue.append(v)
+    return None
+
+
+def Check_separation(g):
+    if graph_tools.scipy is None:
+        print('SciPy not installed, Separation not checked')
+        return
+    names = list(g.vertices)
+    step = max(len(names)//20, 1)            # About 20 pairs, spread over the graph
+    for node1, node2 in zip(names[::step], names[::-step-1]):
+        assert g.Separation(node1, node2) == Bfs_distance(g, node1, node2)
+
+
+#### Vertices without edges, repeated vertices and lookups in the adjacency list, checked on a tiny graph.
+####
+
+def Check_small_graph():
+    g = graph()
+    g.Add_und_edge('a', 'b', 'm1')
+    g.Add_node('z')                          # Vertex with no edges
+    g.Add_node('a')                          # Already a vertex, so nothing happens
+    g.Add_und_edge('b', 'a', 'm2')           # Already an edge, so the value stays m1
+    g.Add_und_edge('c', 'c')                 # Self loop, so nothing happens
+    assert list(g.vertices) == ['a', 'b', 'z'] and g.Size() == [3, 2, 0]
+    assert g.adj_list['a'] == {'b': 'm1'} and g.degrees['z'] == 0
+    assert not g.isNode('c') and g.isEdge('a', 'b') and not g.isEdge('a', 'z')
+
+    assert 'y' not in g.adj_list and g.adj_list.get('y') is None    # Reading does not create vertices
+    g.Add_und_edge('z', 'a')                 # z had an id but no neighbors, so it must not get a second id
+    assert list(g.vertices) == ['a', 'b', 'z'] and g.Size() == [3, 4, 1]
+    assert list(g.Deg_dist()) == [0, 2, 1]
+
+    g.adj_list['y'] = dict()                 # A list put in by hand has no id, so it is not a vertex until an edge is added
+    assert not g.isNode('y') and g.Size() == [3, 4, 1]
+    g.Add_und_edge('y', 'b')
+    assert list(g.vertices) == ['a', 'b', 'z', 'y'] and g.degrees['y'] == 1
+    assert g.adj_list['b'] == {'a': 'm1', 'y': 1} and g.Size() == [4, 6, 2]
+
+    if graph_tools.scipy is not None:
+        g.Add_node('w')
+        assert g.Separation('b', 'z') == 2 and g.Separation('y', 'z') == 3 and g.Separation('b', 'w') is None
+
+    with tempfile.TemporaryDirectory() as dirname:
+        g.Output('out.txt', dirname)
+        with open(os.path.join(dirname, 'out.txt'), 'r') as f_input:
+            lines = f_input.read()
+    expected = 'a: b z \nb: a y \nz: a \ny: b \n'
+    if graph_tools.scipy is not None:
+        expected += 'w: \n'
+    assert lines == expected + '------------------\n'
+
+
+if __name__ == '__main__':
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    Check_small_graph()
+    with tempfile.TemporaryDirectory() as dirname:
+        g = Check_read_edges(Movie_file(num_lines, dirname))
+    Check_degeneracy(g)
+    Check_separation(g)
+    print('All checks passed')
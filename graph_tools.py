@@ -1,9 +1,22 @@
 import os
+import array
+import collections.abc
 import itertools
-import copy
 import numpy as np
 from itertools import combinations
 
+try:
+    from numba import njit
+except ImportError:              # Numba is optional; without it the kernels below run as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+try:
+    import scipy.sparse
+    import scipy.sparse.csgraph
+except ImportError:              # SciPy is optional; only to_csr() and Separation() need it
+    scipy = None
+
 ##### This is the main graph class. It contains the methods for creating and 
 ##### minor manipulations of graphs. The creation and edge insertion process creates 
 ##### undirected graphs with edge labels, though one can easily adapt the representation for directed
@@ -16,6 +29,11 @@ from itertools import combinations
 ##### The neighborhood is stored as a dict(), so that we can store values/labels corresponding to each edge. 
 #####
 ##### So, if an edge (u,v) has value q, then: in the adjacency structure of u, v is a key with value q.
+#####
+##### Each vertex also gets an int id 0,1,2,... in order of creation. Per-vertex data is kept in flat structures indexed
+##### by id: self._id_of maps a vertex to its id, self._name_of maps an id back, and self._deg is an array of degrees
+##### (counted from the neighbor lists on demand, by _build_deg).
+##### The vertices and degrees attributes are read-only views of these; a vertex without edges is added with Add_node.
 
 
 ##### 
@@ -29,33 +47,51 @@ class graph(object):
 ####
 
     def __init__(self):
-        self.adj_list = dict()   # Initial adjacency list is empty dictionary 
-        self.vertices = set()    # Vertices are stored in a set   
-        self.degrees = dict()    # Degrees stored as dictionary
+        self.adj_list = dict()   # Initial adjacency list is empty dictionary
+        self._id_of = dict()     # Vertex -> id
+        self._name_of = []       # Vertices, indexed by id
+        self._deg = array.array('i')    # Degrees, indexed by id (4 bytes each); None when stale, rebuilt by _build_deg()
+        self._indptr = None      # CSR arrays, built on demand by _build_csr()
 
         
+#### The vertices, as a set-like view (supports "in", len() and iteration), and the degrees, as a read-only dictionary view.
+####
+
+    @property
+    def vertices(self):
+        return self._id_of.keys()
+
+    @property
+    def degrees(self):
+        return _DegreeView(self)
+
     def isNode(self, node):
-    # Check if the node is in the graph's vertices
-        if node in self.vertices:
-            return True
-    # Alternatively, you can check if the node is in the adjacency list
-    # if node in self.adj_list:
-    #     return True
-        return False
-
-#### Checks if (node1, node2) is edge of graph. Output is 1 (yes) or 0 (no).
+    # Check if the node has an id
+        return node in self._id_of
+
+#### Checks if (node1, node2) is edge of graph. Output is True (yes) or False (no).
+#### Edges are stored in both directions, so it is enough to look in one neighborhood; we look in the smaller one.
 ####
 
     def isEdge(self,node1,node2):
-        if node1 in self.vertices:               # Check if node1 is vertex
-            if node2 in self.adj_list[node1]:    # Then check if node2 is neighbor of node1
-                return 1                         # Edge is present!
-
-        if node2 in self.vertices:               # Check if node2 is vertex
-            if node1 in self.adj_list[node2]:    # Then check if node1 is neighbor of node2 
-                return 1                         # Edge is present!
+        adj = self.adj_list
+        if node1 not in adj or node2 not in adj:    # Both must be vertices
+            return False
+        nbrs1, nbrs2 = adj[node1], adj[node2]
+        if len(nbrs1) <= len(nbrs2):
+            return node2 in nbrs1
+        return node1 in nbrs2
+
+#### Add node as a vertex with no edges, if it is not a vertex already. It gets the next id, with degree 0.
+####
 
-        return 0                # Edge not present!
+    def Add_node(self,node):
+        if node in self._id_of:
+            return
+        self._indptr = self._deg = None    # One more vertex, so the CSR arrays and degrees are stale
+        self.adj_list[node] = dict()  # Initialize node's list as empty dictionary
+        self._id_of[node] = len(self._name_of)
+        self._name_of.append(node)
 
 #### Add undirected, simple edge (node1, node2, value)
 #### The default value is just 1.
@@ -64,29 +100,25 @@ class graph(object):
     def Add_und_edge(self,node1,node2,value=1):
         if node1 == node2:            # Self loop, so do nothing
             return
-        if node1 in self.vertices:        # Check if node1 is vertex
-            nbrs = self.adj_list[node1]   # nbrs is neighbor list of node1
-            if node2 not in nbrs:         # Check if node2 already neighbor of node1
-                nbrs[node2] = value       # Add node2 with value to the list. So node2 is the key, and value is the, well, value
-                self.degrees[node1] = self.degrees[node1]+1    # Increment degree of node1
-
-        else:                    # So node1 is not vertex
-            self.vertices.add(node1)        # Add node1 to vertices
-            self.adj_list[node1] = dict()  # Initialize node1's list as empty dictionary
-            self.adj_list[node1][node2] = value  # Initialize node1's list to have node2 with associated value
-            self.degrees[node1] = 1         # Set degree of node1 to be 1
-
-        if node2 in self.vertices:        # Check if node2 is vertex
-            nbrs = self.adj_list[node2]   # nbrs is neighbor list of node2
-            if node1 not in nbrs:         # Check if node1 already neighbor of node2
-                nbrs[node1] = value       # Add node1 with value to the list.
-                self.degrees[node2] = self.degrees[node2]+1    # Increment degree of node2
-
-        else:                    # So node2 is not vertex
-            self.vertices.add(node2)        # Add node2 to vertices
-            self.adj_list[node2] = dict()  # Initialize node2's list as empty dictionary
-            self.adj_list[node2][node1] = value # Add node2 to the adjacency list, with associated value
-            self.degrees[node2] = 1         # Set degree of node2 to be 1
+        id_of = self._id_of           # Local names are faster than attribute lookups
+        id1 = id_of.get(node1)
+        if id1 is None:               # node1 has no id, so it is new. Add it as a vertex first
+            self.Add_node(node1)
+            id1 = id_of[node1]
+        adj = self.adj_list
+        nbrs = adj[node1]             # nbrs is neighbor list of node1
+        if node2 in nbrs:             # node2 already neighbor of node1. Edges are stored both ways, so then node1 is a neighbor of node2 too
+            return
+        id2 = id_of.get(node2)
+        if id2 is None:               # Same for node2
+            self.Add_node(node2)
+            id2 = id_of[node2]
+        self._indptr = self._deg = None    # Graph changes, so the CSR arrays and degrees are stale
+        name_of = self._name_of
+        # Use the name objects stored with the vertices as keys, so that a name that is passed in again and again
+        # (e.g. read from many lines of a file) is stored only once, whatever object the caller passes.
+        nbrs[name_of[id2]] = value    # Add node2 with value to the list. So node2 is the key, and value is the, well, value
+        adj[node2][name_of[id1]] = value    # Add node1 with value to the list of node2
 
 #### Read a graph from a file with list of edges. Arguments are fname (file name), sep (separator). Looks for file fname.
 #### Assumes that line looks like:
@@ -113,6 +145,7 @@ class graph(object):
 #             self.Add_und_edge(tokens[0],tokens[1]) # Add undirected edge given by first two tokens
 
     def Read_edges(self,fname,sep=None):
+        movies = dict()          # Movie name -> the one name object kept for it, so a movie on several lines is stored once
         with open(fname, 'r', encoding='utf-8') as file:
             for line in file:
                 # Skip empty lines or comments
@@ -123,7 +156,7 @@ class graph(object):
                 tokens = line.strip().split(' ')
 
                 # Extract the movie name and actors
-                movie = tokens[0]
+                movie = movies.setdefault(tokens[0], tokens[0])
                 actors = tokens[1:]
 
                 # Add an edge between every pair of actors for the movie
@@ -134,30 +167,27 @@ class graph(object):
 ####
 
     def Size(self):
-        n = len(self.vertices)            # Number of vertices
-
-        m = 0                    # Initialize edges/wedges = 0
-        wedge = 0
-        for node in self.vertices:        # Loop over nodes
-            deg = self.degrees[node]      # Get degree of node
-            m = m + deg                   # Add degree to current edge count
-            wedge = wedge+deg*(deg-1)/2   # Add wedges centered at node to wedge count
+        n = len(self._name_of)            # Number of vertices
+        if self._deg is None:
+            self._build_deg()
+        degs = np.frombuffer(self._deg, dtype=np.int32).astype(np.int64)    # Degrees, widened so wedges do not overflow
+
+        m = int(degs.sum())                          # Sum of degrees
+        wedge = int((degs*(degs-1)//2).sum())        # Sum of wedges centered at each node
         return [n, m, wedge]              # Return size info
 
 #### Print the adjacency list of the graph. Output is written in dirname/fname. 
 ####
  
     def Output(self,fname,dirname):
-        os.chdir(dirname)
-        f_output = open(fname,'w')    # Opening file
-
-        for node1 in list(self.adj_list.keys()):   # Looping over nodes
-            f_output.write(str(node1)+': ')        # Writing node
-            for node2 in (self.adj_list)[node1]:   # Looping over neighbors of node1
-                f_output.write(str(node2)+' ')     # Writing out neighbor
-            f_output.write('\n')
-        f_output.write('------------------\n')     # Ending with dashes
-        f_output.close()
+        with open(os.path.join(dirname,fname),'w') as f_output:    # Opening file
+            write = f_output.write                   # Bound once, it is called for every neighbor
+            for node1, nbrs in self.adj_list.items():    # Looping over nodes and their neighbor lists
+                write(str(node1)+': ')               # Writing node
+                for node2 in nbrs:                   # Looping over neighbors of node1
+                    write(str(node2)+' ')            # Writing out neighbor
+                write('\n')
+            write('------------------\n')     # Ending with dashes
 
 #### Compute the degree distribution of graph. Note that the degree is the size of the neighbor list, and is hence the *out*-degree if graph is directed. 
 #### Output is a list, where the ith entry is the number of nodes of degree i.
@@ -165,94 +195,202 @@ class graph(object):
 ####
  
     def Deg_dist(self,fname=''):
-        degs = list((self.degrees).values())    # List of degrees
+        if self._deg is None:
+            self._build_deg()
+        degs = np.frombuffer(self._deg, dtype=np.int32)    # Array of degrees, without copying
         dd = np.bincount(degs)                  # Doing bincount, so dd[i] is number of entries of value i in degs
-        if fname != '':                         # If file name is actually given
-            f_input = open(fname,'w')
-            for count in dd:                    # Write out each count in separate line
-                f_input.write(str(count)+'\n')
-            f_input.close()
+        if fname != '':                         # If file name is actually given, write out each count in separate line
+            np.savetxt(fname, dd, fmt='%d')
         return dd 
 
+#### Count the degrees again from the neighbor lists, in id order. Adding vertices or edges only marks them stale.
+####
+
+    def _build_deg(self):
+        self._deg = array.array('i', map(len, map(self.adj_list.__getitem__, self._name_of)))
+
+#### Build a compressed sparse row (CSR) copy of the adjacency list, over the vertex ids. The neighbors of vertex v are
+#### self._indices[self._indptr[v]:self._indptr[v+1]]. Edge values are not stored.
+####
+
+    def _build_csr(self):
+        n = len(self._name_of)
+        nbr_lists = map(self.adj_list.__getitem__, self._name_of)    # Neighbor lists in id order
+
+        if self._deg is None:
+            self._build_deg()
+        self._indptr = np.zeros(n+1, dtype=np.int64)
+        np.cumsum(np.frombuffer(self._deg, dtype=np.int32), out=self._indptr[1:])
+        self._indices = np.fromiter(map(self._id_of.__getitem__, itertools.chain.from_iterable(nbr_lists)),    # No Python-level loop
+                                    dtype=np.int32, count=int(self._indptr[-1]))
+
+#### The graph as an n x n SciPy sparse matrix, built from the CSR arrays (entry (i,j) is 1 if there is an edge from vertex id i to
+#### vertex id j). This lets the compiled routines of scipy.sparse.csgraph run on the graph.
+####
+
+    def to_csr(self):
+        if scipy is None:
+            raise ImportError('to_csr() needs SciPy')
+        if self._indptr is None:     # (Re)build the CSR arrays if the graph changed since the last build
+            self._build_csr()
+        n = len(self._name_of)
+        return scipy.sparse.csr_matrix((np.ones(self._indices.size, dtype=np.int8), self._indices, self._indptr), shape=(n, n))
+
+#### Degrees of separation: the number of edges on a shortest path from node1 to node2, or None if there is no path.
+#### This is a breadth first search from node1, run by csgraph.shortest_path in compiled code.
+####
+
+    def Separation(self,node1,node2):
+        if scipy is None:
+            raise ImportError('Separation() needs SciPy')
+        source, target = self._id_of[node1], self._id_of[node2]
+        dist = scipy.sparse.csgraph.shortest_path(self.to_csr(), method='D', unweighted=True, indices=source)
+        if np.isinf(dist[target]):
+            return None
+        return int(dist[target])
+
 #### The fun stuff. This computes the core numbers/degeneracy by applying the minimum vertex removal algorithm. Basically, it iteratively removes 
 #### the vertex of minimum degree, till the graph is empty. This leads to an order of vertex removal, say v1, v2, v3,...,vn. The algorithm then
 #### constructs the graph where all edges only point from vi to vj where i < j. This creates a DAG, where each edge of the original graph is directed.
 #### 
 #### The output is this directed graph. Each DAG object (see end) has an associated topological ordering of vertices. In this case, this ordering
 #### is just v1, v2, ..., vn.
+####
+#### The removal order itself is computed by _degeneracy_numba (see end) on the CSR arrays.
 #### 
 
     def Degeneracy(self):
-        G = copy.deepcopy(self)      # Generate deepcopy, since we will modify G
-        n = len(G.vertices)
-        top_order = [0]*(n+1)        # Initialize list of degeneracy ordering
+        if self._indptr is None:     # (Re)build the CSR arrays if the graph changed since the last build
+            self._build_csr()
+        indptr, indices = self._indptr, self._indices
+        names = self._name_of
+        n = len(names)
         core_G = DAG()               # This is the DAG that will be output
-        core_G.vertices = copy.deepcopy(G.vertices)    # Vertices are the same
-        for node in core_G.vertices: # Initialize adjacency list and degrees of core_G, the output
-            core_G.adj_list[node] = set()
-            core_G.degrees[node] = 0
-
-        deg_list = [set() for _ in range(n)]    # Initialize list, where ith entry is set of deg i vertices
-        min_deg = n       # variable for min degree of graph
-
-       
-        for node in G.vertices:    # Loop over nodes
-            deg = G.degrees[node]      # Get degree of node
-            deg_list[deg].add(node)    # Update deg_list with node
-            if deg < min_deg:          # Update min_deg
-                min_deg = deg
-
-        # At this stage, deg_list[d] is the list of vertices of degree d
-
-        for i in range(n):        # The main loop, just going n times
-                                  
-            # We first need the vertex of minimum degree. Due to the looping and deletion of vertex, we may have exhaused
-            # all vertices of minimum degree. We need to update the minimum degree
-
-            while len(deg_list[min_deg]) == 0:  # update min_deg to reach non-empty set
-                min_deg = min_deg+1
-                
-            source = deg_list[min_deg].pop()    # get vertex called "source" with minimum degree 
-            core_G.top_order.append(source)     # append to this to topological ordering
-            
-            # We got the vertex of the ordering! All we need to do now is delete vertex from the graph,
-            # and update deg_list appropriately.
-
-            for node in G.adj_list[source]: # loop over nbrs of source, each nbr called "node" 
- 
-                # We update deg_list
-                deg = G.degrees[node]           # degree of node
-                deg_list[deg].remove(node)      # move node in deg_list, decreasing its degree by 1
-                deg_list[deg-1].add(node)
-                if deg-1 < min_deg:             # update min_deg in case node has lower degree
-                    min_deg = deg-1
-
-               
-                # We then remove the edge (node,source) from G
-                G.adj_list[node].remove(source) # remove this edge from G
-                G.degrees[node] -= 1            # update degree of node
-
-                core_G.adj_list[source].add(node) # Add directed edge (source,node) to output DAG core_G
-                core_G.degrees[source] += 1       # Update the degree of source
-                
+        core_G._id_of = dict(self._id_of)    # Vertices and their ids are the same
+        core_G._name_of = list(names)
+
+        core_G.top_order = array.array('i', [0])*n    # Filled in by the kernel: top_order[i] is the id of the ith vertex removed
+        order = _degeneracy_numba(indptr, indices, n, np.frombuffer(core_G.top_order, dtype=np.int32))    # Writes through to top_order
+
+        # Direct every edge (u,v) from the endpoint removed first to the one removed later.
+
+        rank = np.empty(n, dtype=np.int32)       # rank[v] is the position of v in the ordering
+        rank[order] = np.arange(n, dtype=np.int32)
+        src = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+        forward = rank[indices] > rank[src]      # Edges that point forward in the ordering
+        out_indptr = np.zeros(n+1, dtype=np.int64)
+        out_degs = np.bincount(src[forward], minlength=n).astype(np.int32)
+        np.cumsum(out_degs, out=out_indptr[1:])
+        core_G._deg = array.array('i', out_degs.tobytes())    # Degrees of core_G are the out-degrees
+        out_indptr = out_indptr.tolist()
+        out_indices = indices[forward].tolist()
+
+        for v in range(n):           # Fill adjacency list of core_G, the output
+            core_G.adj_list[names[v]] = set(map(names.__getitem__, out_indices[out_indptr[v]:out_indptr[v+1]]))
+
         return core_G
 
 
+#### Read-only dictionary view of the degrees of graph g, so that g.degrees[node] works as before.
+####
+
+class _DegreeView(collections.abc.Mapping):
+
+    def __init__(self, g):
+        self._g = g
+
+    def __getitem__(self, node):
+        return len(self._g.adj_list[node])    # Same as the degree array, but without rebuilding it
+
+    def __iter__(self):
+        return iter(self._g._name_of)
+
+    def __len__(self):
+        return len(self._g._name_of)
+
+
 #### The DAG class is inherited from the graph class, and the only difference is an additional topological ordering.
+#### The ordering holds vertex ids, and self._name_of maps an id back to the vertex.
 #### For outputting into a file, we print the vertices in topological order, so we redefine output.
 
 class DAG(graph):
 
     def __init__(self):
         super(DAG,self).__init__()
-        DAG.top_order = []
+        self.top_order = array.array('i')    # Topological order of the vertices (as ids), one per DAG
 
-    def Output(self,fname):
-        f_output = open(fname,'w')
+#### Edges are directed here, so an edge may be stored in only one direction. Output is True if it is stored in either.
+####
+
+    def isEdge(self,node1,node2):
+        adj = self.adj_list
+        return (node1 in adj and node2 in adj[node1]) or (node2 in adj and node1 in adj[node2])
 
-        for node1 in list(self.top_order):
-            f_output.write(str(node1)+': ')
-            for node2 in (self.adj_list)[node1]:
-                f_output.write(str(node2)+' ')
-            f_output.write('\n')
+    def Output(self,fname):
+        adj = self.adj_list
+        with open(fname,'w') as f_output:
+            write = f_output.write
+            for node1 in map(self._name_of.__getitem__, self.top_order):    # Vertices in topological order
+                write(str(node1)+': ')
+                for node2 in adj[node1]:
+                    write(str(node2)+' ')
+                write('\n')
+
+
+#### The Batagelj-Zaversnik algorithm for the minimum degree removal order, compiled with Numba. Arguments are the CSR arrays
+#### of an undirected graph, n, the number of vertices, and vert, an int32 array of length n. On return, vert holds the vertices
+#### in order of removal; it is also the return value.
+####
+#### The vertices are kept in vert[], sorted by current degree, and pos[v] is the position of v in vert[]. bin_start[d] is the
+#### position of the first remaining vertex of degree d. Decreasing the degree of u just swaps u with the first vertex of its bin
+#### and moves the bin boundary, so there are no sets or hashing, and the whole run is O(n+m).
+####
 
+@njit(cache=True, boundscheck=False)
+def _degeneracy_numba(indptr, indices, n, vert):
+    deg = np.empty(n, dtype=np.int32)
+    max_deg = 0
+    for v in range(n):
+        deg[v] = indptr[v+1] - indptr[v]
+        if deg[v] > max_deg:
+            max_deg = deg[v]
+
+    bin_start = np.zeros(max_deg+1, dtype=np.int32)    # Counting sort of the vertices by degree
+    for v in range(n):
+        bin_start[deg[v]] += 1
+    start = 0
+    for d in range(max_deg+1):
+        count = bin_start[d]
+        bin_start[d] = start
+        start += count
+
+    pos = np.empty(n, dtype=np.int32)
+    for v in range(n):
+        pos[v] = bin_start[deg[v]]
+        vert[pos[v]] = v
+        bin_start[deg[v]] += 1
+    for d in range(max_deg, 0, -1):    # Placing vertices moved each bin start to the next bin; shift them back
+        bin_start[d] = bin_start[d-1]
+    bin_start[0] = 0
+
+    for i in range(n):           # vert[i] is always a vertex of minimum degree in the remaining graph
+        v = vert[i]
+        d = deg[v]
+        bin_start[d] = i+1       # Remove v. Bins d and d-1 now start right after v; bin d-1 is empty
+        if d > 0:
+            bin_start[d-1] = i+1
+        for k in range(indptr[v], indptr[v+1]):
+            u = indices[k]
+            pu = pos[u]
+            if pu > i:           # u is still in the graph, so its degree drops by 1
+                du = deg[u]
+                pw = bin_start[du]
+                w = vert[pw]
+                vert[pu] = w     # Swap u with the first vertex w of its bin
+                vert[pw] = u
+                pos[w] = pu
+                pos[u] = pw
+                bin_start[du] += 1
+                deg[u] -= 1
+
+    return vert